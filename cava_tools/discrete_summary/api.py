@@ -1,6 +1,10 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Dict, Optional, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from loguru import logger
 from typing_extensions import Literal
@@ -17,6 +21,16 @@ from cava_tools.discrete_summary.validator import check_types_and_replace
 HERE = Path(__file__).parent
 SOURCEDF = pd.read_csv(HERE.joinpath("data/source.csv"), index_col="cruise_id")
 HEADERSDF = pd.read_csv(HERE.joinpath("data/discreteSummaryHeaderMap.csv"))
+CRUISE_ID_DTYPE = pd.CategoricalDtype(SOURCEDF.index.tolist())
+_CONTENT_NAME_RE = re.compile(r"README|Discrete_Summary")
+_MAX_WORKERS = 8
+
+
+def _as_category(df: pd.DataFrame, columns: List[str]) -> None:
+    """Cast low cardinality label columns to categorical in place"""
+    for col in columns:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
 
 
 def get_contents(cruise_id: Optional[str] = None) -> Optional[pd.DataFrame]:
@@ -38,14 +52,18 @@ def get_contents(cruise_id: Optional[str] = None) -> Optional[pd.DataFrame]:
         for cruise_id, row in SOURCEDF.iterrows():
             d = get_folder_contents(row.folder_url)
             if isinstance(d, pd.DataFrame):
-                d.loc[:, "cruise_id"] = cruise_id
+                d["cruise_id"] = pd.Categorical(
+                    [cruise_id] * len(d), dtype=CRUISE_ID_DTYPE
+                )
                 df_list.append(d)
-        return pd.concat(df_list)
+        return pd.concat(df_list, ignore_index=True, sort=False)
 
     row = SOURCEDF.loc[cruise_id]
     contentsdf = get_folder_contents(row.folder_url)
     if isinstance(contentsdf, pd.DataFrame):
-        contentsdf.loc[:, "cruise_id"] = cruise_id
+        contentsdf["cruise_id"] = pd.Categorical(
+            [cruise_id] * len(contentsdf), dtype=CRUISE_ID_DTYPE
+        )
         return contentsdf
 
 
@@ -68,18 +86,30 @@ def filter_contents(
     -------
     pd.DataFrame
     """
-    filtered_files = contents[
-        (contents["modified"] > "2013")
-        & (contents["name"].str.contains("README|Discrete_Summary"))
-        & ~(contents["name"].str.contains(".xls"))
-    ].reset_index(drop="index")
-    filtered_files.loc[:, "kind"] = filtered_files.apply(
-        lambda row: "readme" if "README" in row["name"] else "summary", axis=1
+    names = contents["name"].to_numpy()
+    name_mask = np.fromiter(
+        (
+            bool(_CONTENT_NAME_RE.search(n)) and ".xls" not in n
+            for n in names
+        ),
+        dtype=bool,
+        count=len(names),
+    )
+    time_mask = (contents["modified"] > pd.Timestamp("2013-01-01")).to_numpy()
+    filtered_files = contents.loc[name_mask & time_mask].reset_index(
+        drop="index"
+    )
+    filtered_files["kind"] = pd.Categorical(
+        np.where(
+            filtered_files["name"].str.contains("README", regex=False),
+            "readme",
+            "summary",
+        )
     )
     if kind == "all":
         return filtered_files
     elif kind in ["readme", "summary"]:
-        return filtered_files[filtered_files.kind.str.match(kind)].reset_index(
+        return filtered_files[filtered_files["kind"] == kind].reset_index(
             drop="index"
         )
     else:
@@ -103,11 +133,12 @@ def get_latest_content(
     if "cruise_id" not in contents.columns:
         raise ValueError("Contents dataframe must have cruise_id column!")
 
-    if "kind" in contents.columns:
-        group = contents.groupby(["cruise_id", "kind"])
-    else:
-        group = contents.groupby("cruise_id")
-    latest = contents.loc[group["modified"].idxmax()]
+    by = ["cruise_id", "kind"] if "kind" in contents.columns else ["cruise_id"]
+    group = contents.groupby(by, observed=True)
+    latest_modified = group["modified"].transform("max")
+    # Keep a single row per group when modified times tie, like idxmax
+    is_latest = contents["modified"].eq(latest_modified)
+    latest = contents[is_latest].drop_duplicates(subset=by)
     if isinstance(latest, pd.DataFrame):
         latest = latest.reset_index(drop="index")
         if len(latest) == 1:
@@ -118,6 +149,59 @@ def get_latest_content(
         return latest
 
 
+def _read_summary_csv(url: str) -> pd.DataFrame:
+    """Read a discrete summary csv, with the pyarrow engine when available"""
+    na_values = ["-9999999", "-9999999.0"]
+    try:
+        return pd.read_csv(url, na_values=na_values, engine="pyarrow")
+    except (ImportError, ValueError):
+        # pyarrow not installed or engine not supported by this pandas
+        return pd.read_csv(url, na_values=na_values)
+
+
+def _load_one(
+    cruise_id: str,
+    url: str,
+    array_rd: str,
+    expected_columns: Optional[List[str]] = None,
+) -> Tuple[str, pd.DataFrame, pd.DataFrame]:
+    """Read and clean a single discrete summary file"""
+    # Tag every log record from this file, workers run concurrently
+    with logger.contextualize(cruise_id=cruise_id):
+        logger.info(f"{cruise_id}: {url}")
+        if url.endswith(".csv"):
+            svdf = _read_summary_csv(url)
+        elif url.endswith(".xlsx"):
+            svdf = pd.read_excel(url, na_values=["-9999999"])
+
+        clean_svdf, discrete_sample_labels = clean_discrete_summary(
+            svdf, expected_columns=expected_columns
+        )
+        labels = pd.DataFrame(discrete_sample_labels).set_index("name")
+        if array_rd == "CE":
+            # Fix some O, 0 weirdness...
+            stations = clean_svdf["station"].astype(object)
+            is_str = stations.map(lambda s: isinstance(s, str))
+            if is_str.any():
+                str_stations = stations.where(is_str)
+                bad = stations[
+                    str_stations.str.contains("O", regex=False, na=False)
+                ]
+                if len(bad) > 0:
+                    logger.warning(
+                        f"{', '.join(bad.unique())} found! Replacing O with 0..."  # noqa
+                    )
+                replaced = str_stations.str.replace("O", "0", regex=False)
+                # Non-string values are kept as is
+                clean_svdf["station"] = replaced.where(is_str, stations)
+        clean_svdf["cruise_id"] = pd.Categorical(
+            [cruise_id] * len(clean_svdf), dtype=CRUISE_ID_DTYPE
+        )
+        final_svdf = clean_svdf.reset_index(drop=True)
+        cleaned_final_svdf = check_types_and_replace(final_svdf)
+        return array_rd, cleaned_final_svdf, labels
+
+
 def read_and_clean(
     discrete_summaries: Union[pd.DataFrame, pd.Series]
 ) -> Tuple[dict]:  # noqa
@@ -147,47 +231,29 @@ def read_and_clean(
     merged_summaries = pd.merge(discrete_summaries, SOURCEDF, on="cruise_id")
     expected_columns = get_ds_labels(HEADERSDF.summaryColumn)["name"]
 
+    load_one = partial(_load_one, expected_columns=expected_columns)
+    with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as executor:
+        results = list(
+            executor.map(
+                load_one,
+                merged_summaries["cruise_id"],
+                merged_summaries["url"],
+                merged_summaries["array_rd"],
+            )
+        )
+
     svdf_arrays = {}
     label_arrays = {}
-    for _, row in merged_summaries.iterrows():
-        logger.info("------------------------")
-        logger.info(row["cruise_id"])
-        url = row["url"]
-        logger.info(url)
-        if url.endswith(".csv"):
-            svdf = pd.read_csv(url, na_values=["-9999999"])
-        elif url.endswith(".xlsx"):
-            svdf = pd.read_excel(url, na_values=["-9999999"])
-
-        if row["array_rd"] not in svdf_arrays:
-            svdf_arrays[row["array_rd"]] = []
+    for array_rd, cleaned_final_svdf, labels in results:
+        svdf_arrays.setdefault(array_rd, []).append(cleaned_final_svdf)
+        label_arrays[array_rd] = labels
 
-        clean_svdf, discrete_sample_labels = clean_discrete_summary(
-            svdf, expected_columns=expected_columns
-        )
-        label_arrays[row["array_rd"]] = pd.DataFrame(
-            discrete_sample_labels
-        ).set_index(  # noqa
-            "name"
-        )
-        if row["array_rd"] == "CE":
-            # Fix some O, 0 weirdness...
-            for s in clean_svdf["station"].unique():
-                if isinstance(s, str) and "O" in s:
-                    logger.warning(
-                        f"{s} found! Fixing to {s.replace('O', '0')}..."
-                    )  # noqa
-            clean_svdf.loc[:, "station"] = clean_svdf["station"].apply(
-                lambda r: r.replace("O", "0") if isinstance(r, str) else r
-            )
-        clean_svdf.loc[:, "cruise_id"] = row["cruise_id"]
-        final_svdf = clean_svdf.reset_index(drop=True)
-        cleaned_final_svdf = check_types_and_replace(final_svdf)
-        svdf_arrays[row["array_rd"]].append(cleaned_final_svdf)
+    all_svdf = {}
+    for array_rd, svdf_list in svdf_arrays.items():
+        all_svdf[array_rd] = pd.concat(svdf_list, sort=False)
+        _as_category(all_svdf[array_rd], ["station"])
 
-    return {
-        k: pd.concat(v, sort=False) for k, v in svdf_arrays.items()
-    }, label_arrays  # noqa
+    return all_svdf, label_arrays
 
 
 def split_summary_data(
@@ -199,13 +265,18 @@ def split_summary_data(
         sampledf = v.copy()
         profile_df, discrete_df = parse_profile_and_discrete(sampledf, k)
         profile_list.append(profile_df)
-        if any(discrete_df.columns.isin(["calculated_dic", "calculated_pco2"])):  # noqa
-            if all(discrete_df["calculated_dic"].isna()):
-                discrete_df.drop("calculated_dic", axis=1, inplace=True)
-            if all(discrete_df["calculated_pco2"].isna()):
-                discrete_df.drop("calculated_pco2", axis=1, inplace=True)
+        # Drop calculated columns that have no values at all
+        to_drop = [
+            c
+            for c in ["calculated_dic", "calculated_pco2"]
+            if c in discrete_df.columns and not discrete_df[c].notna().any()
+        ]
+        if to_drop:
+            discrete_df = discrete_df.drop(columns=to_drop)
         discrete_list.append(discrete_df)
 
     all_profiles = pd.concat(profile_list, sort=False).reset_index(drop=True)
     all_discrete = pd.concat(discrete_list, sort=False).reset_index(drop=True)
+    for df in [all_profiles, all_discrete]:
+        _as_category(df, ["cruise_id", "array_rd", "area_rd"])
     return {"profile": all_profiles, "discrete": all_discrete}
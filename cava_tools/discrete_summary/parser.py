@@ -1,5 +1,6 @@
 import re
-from typing import List, Optional, Tuple
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
 from urllib.parse import urlparse
 
 import numpy as np
@@ -11,14 +12,31 @@ from lxml import etree
 from cava_tools.discrete_summary.validator import check_name
 
 
-def get_ds_labels(cols: str) -> dict:
+_COL_RE = re.compile(r"(((\w+-?\w?)\s?)+)(\[.*\])?")
+
+
+@lru_cache(maxsize=64)
+def _parse_ds_labels(cols: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+    parsed = []
+    for col in cols:
+        match = _COL_RE.search(col)
+        if match:
+            matches = match.groups()
+            unit = matches[-1]
+            if unit:
+                unit = unit.strip("[]")
+            parsed.append((matches[0].strip(), unit))
+    return tuple(parsed)
+
+
+def get_ds_labels(cols: Iterable[str]) -> dict:
     """
     Parses discrete samples labels and turns them into a dictionary.
     It turns the name to lower case and split up the units.
 
     Parameters
     ----------
-    cols: list
+    cols: iterable
         A listing of all the labels to be parsed.
 
     Returns
@@ -29,19 +47,13 @@ def get_ds_labels(cols: str) -> dict:
     names = []
     display_name = []
     units = []
-    for col in cols:
-        match = re.search(r"(((\w+-?\w?)\s?)+)(\[.*\])?", col)
-        if match:
-            matches = match.groups()
-            name = matches[0].strip()
-            unit = matches[-1]
-            if unit:
-                unit = unit.strip("[]")
-            name = check_name(name)
-            if "name" != "unnamed":
-                names.append(name.lower().replace(" ", "_"))
-                display_name.append(name)
-                units.append(unit)
+    # name checks log warnings, so they run on every call, not cached
+    for name, unit in _parse_ds_labels(tuple(cols)):
+        name = check_name(name)
+        if "name" != "unnamed":
+            names.append(name.lower().replace(" ", "_"))
+            display_name.append(name)
+            units.append(unit)
 
     # for later, maybe save into separate table?
     discrete_samples_labels = {
@@ -52,6 +64,22 @@ def get_ds_labels(cols: str) -> dict:
     return discrete_samples_labels
 
 
+# Selects file links and their detail cells from the second recordSet
+# table in document order, skipping header cells (which carry a class)
+_FOLDER_COL_IDS = {
+    "col13-txt": "description",
+    "col15-txt": "size",
+    "col16-txt": "created",
+    "col17-txt": "modified",
+}
+_FOLDER_ITEMS_XP = etree.XPath(
+    "(//table[@class='recordSet'])[2]//*[not(@class) and "
+    "(@target='new' or "
+    + " or ".join(f"contains(@id, '{c}')" for c in _FOLDER_COL_IDS)
+    + ")]"
+)
+
+
 def get_folder_contents(folder_url: str) -> pd.DataFrame:
     """
     Parses and retrieves alfresco folder content from url.
@@ -69,54 +97,70 @@ def get_folder_contents(folder_url: str) -> pd.DataFrame:
     req = requests.get(folder_url)
     if req.status_code == 200:
         html = etree.HTML(req.content)
-        content_tables = [
-            t
-            for t in html.xpath("//table")
-            if "class" in t.attrib and t.attrib["class"] == "recordSet"
-        ]
-        for c in content_tables[1].getchildren():
-            headers = []
-            all_files = {}
-            last_fname = ""
-            for i in c.iter():
-                if i.text:
-                    if "class" in i.attrib:
-                        headers.append(i.text)
-                    elif "target" in i.attrib and i.attrib["target"] == "new":
-                        fdct = {
-                            "name": i.text,
-                            "url": f"{pr.scheme}://{pr.netloc}{i.attrib['href']}",  # noqa
-                            "description": "",
-                            "size": "",
-                            "created": "",
-                            "modified": "",
-                        }
-                        all_files[fdct["name"]] = fdct
-                        last_fname = fdct["name"]
-                    elif "id" in i.attrib:
-                        if "col13-txt" in i.attrib["id"]:
-                            all_files[last_fname]["description"] = i.text
-                        elif "col15-txt" in i.attrib["id"]:
-                            all_files[last_fname]["size"] = i.text
-                        elif "col16-txt" in i.attrib["id"]:
-                            all_files[last_fname]["created"] = i.text
-                        elif "col17-txt" in i.attrib["id"]:
-                            all_files[last_fname]["modified"] = i.text
-        df = pd.DataFrame(list(all_files.values()))
-        df.loc[:, "modified"] = df.modified.apply(pd.to_datetime)
-        df.loc[:, "created"] = df.created.apply(pd.to_datetime)
+        cols = {
+            "name": [],
+            "url": [],
+            "description": [],
+            "size": [],
+            "created": [],
+            "modified": [],
+        }
+        name_to_idx = {}
+        last_idx = None
+        for i in _FOLDER_ITEMS_XP(html):
+            if not i.text:
+                continue
+            if i.get("target") == "new":
+                name = i.text
+                url = f"{pr.scheme}://{pr.netloc}{i.get('href')}"
+                if name in name_to_idx:
+                    # Same file listed again, reset its existing row
+                    last_idx = name_to_idx[name]
+                    cols["url"][last_idx] = url
+                    for field in _FOLDER_COL_IDS.values():
+                        cols[field][last_idx] = ""
+                else:
+                    last_idx = len(cols["name"])
+                    name_to_idx[name] = last_idx
+                    cols["name"].append(name)
+                    cols["url"].append(url)
+                    for field in _FOLDER_COL_IDS.values():
+                        cols[field].append("")
+            else:
+                elid = i.get("id")
+                for col_id, field in _FOLDER_COL_IDS.items():
+                    if col_id in elid:
+                        cols[field][last_idx] = i.text
+                        break
+        df = pd.DataFrame(cols, copy=False)
+        df["modified"] = pd.to_datetime(df["modified"], errors="coerce")
+        df["created"] = pd.to_datetime(df["created"], errors="coerce")
         return df
     else:
         logger.warning(f"Error found. {req.status_code}")
 
 
-def _convert_dt(time_str):
+# pandas >= 2 infers a single format from the first value unless told
+# otherwise, summary files mix formats even within one column
+_MIXED_FORMAT = (
+    {"format": "mixed"} if int(pd.__version__.split(".")[0]) >= 2 else {}
+)
+
+
+def _parse_time(value):
     try:
-        dt = pd.to_datetime(time_str)
+        return pd.to_datetime(value)
     except Exception:
-        logger.warning(f"Invalid time str: {time_str}")
-        dt = np.NaN
-    return dt
+        return pd.NaT
+
+
+def _parse_times(values: pd.Series) -> pd.Series:
+    """Parse time values, invalid ones become NaT"""
+    try:
+        return pd.to_datetime(values, errors="coerce", **_MIXED_FORMAT)
+    except (TypeError, ValueError):
+        # e.g. tz-aware and naive values in the same column
+        return values.map(_parse_time)
 
 
 def clean_discrete_summary(
@@ -152,13 +196,19 @@ def clean_discrete_summary(
             logger.warning(f"MISSING COLUMNS: {', '.join(missing_cols)}")
 
     cleaned.columns = names
-    all_cleaned = cleaned.replace(-9999999.0, np.NaN).dropna(subset=["cruise"])
-    time_cols = all_cleaned.columns[all_cleaned.columns.str.contains("time")]
+    time_cols = [n for n in names if "time" in n]
+    all_cleaned = cleaned.replace([-9999999.0, "-9999999"], np.nan).dropna(
+        subset=["cruise"]
+    )
     for col in time_cols:
-        all_cleaned = all_cleaned.replace("-9999999", np.NaN).dropna(
-            subset=[col]
-        )  # noqa
-        all_cleaned.loc[:, col] = all_cleaned[col].apply(_convert_dt)
+        converted = _parse_times(all_cleaned[col])
+        invalid = all_cleaned[col].notna() & converted.isna()
+        if invalid.any():
+            invalid_values = ", ".join(
+                all_cleaned.loc[invalid, col].astype(str).unique()
+            )
+            logger.warning(f"Invalid time str: {invalid_values}")
+        all_cleaned[col] = converted
 
     all_cleaned = all_cleaned.dropna(subset=time_cols).reset_index(drop="index")  # noqa
     if all_cleaned.station.isnull().values.any():
@@ -167,44 +217,50 @@ def clean_discrete_summary(
     return all_cleaned, discrete_samples_labels
 
 
-def _set_area(station):
-    if isinstance(station, str):
-        st = station.lower()
-        if re.search(r"(oregon\s+)?slope\s+base", st):
-            return "oregon-slope-base"
-        elif re.search(r"axial\s+base", st):
-            return "axial-base"
-        elif re.search(r"axial.*international\s+district", st):
-            return "axial-caldera"
-        elif re.search(r"axial\s+caldera", st):
-            return "axial-caldera"
-        elif re.search(r"(southern\s+)?hydrate\s+ridge", st):
-            return "southern-hydrate-ridge"
-        elif re.search(r"mid\s+plate", st):
-            return "mid-plate"
-        elif re.search(r"oregon\s+inshore|ce01", st):
-            return "oregon-inshore"
-        elif re.search(r"oregon\s+shelf|ce02", st):
-            return "oregon-shelf"
-        elif re.search(r"oregon\s+offshore|ce04", st):
-            return "oregon-offshore"
-        elif re.search(r"washington\s+inshore|ce06", st):
-            return "washington-inshore"
-        elif re.search(r"washington\s+shelf|ce07", st):
-            return "washington-shelf"
-        elif re.search(r"washington\s+offshore|ce09", st):
-            return "washington-offshore"
-        else:
-            raise ValueError(f"Unknown area: {st}")
-    else:
-        return ""
+_AREA_RULES = [
+    (re.compile(pattern), label)
+    for pattern, label in [
+        (r"(?:oregon\s+)?slope\s+base", "oregon-slope-base"),
+        (r"axial\s+base", "axial-base"),
+        (r"axial.*international\s+district", "axial-caldera"),
+        (r"axial\s+caldera", "axial-caldera"),
+        (r"(?:southern\s+)?hydrate\s+ridge", "southern-hydrate-ridge"),
+        (r"mid\s+plate", "mid-plate"),
+        (r"oregon\s+inshore|ce01", "oregon-inshore"),
+        (r"oregon\s+shelf|ce02", "oregon-shelf"),
+        (r"oregon\s+offshore|ce04", "oregon-offshore"),
+        (r"washington\s+inshore|ce06", "washington-inshore"),
+        (r"washington\s+shelf|ce07", "washington-shelf"),
+        (r"washington\s+offshore|ce09", "washington-offshore"),
+    ]
+]
+
 
+def _set_area_vec(stations: pd.Series) -> np.ndarray:
+    """Map station names to area names, first matching rule wins"""
+    out = np.full(len(stations), "", dtype=object)
+    # Blank out non-string stations so .str works on any column
+    stations = stations.astype(object)
+    is_str = stations.map(lambda s: isinstance(s, str))
+    lower = stations.where(is_str).str.lower()
+    for pat, label in _AREA_RULES:
+        mask = lower.str.contains(pat, na=False).to_numpy() & (out == "")
+        out[mask] = label
 
-def _check_double_sensors(row: pd.Series, var: str):
-    if pd.isna(row[f"{var}_1"]):
-        if not pd.isna(row[f"{var}_2"]):
-            return row[f"{var}_2"]
-    return row[f"{var}_1"]
+    unknown = lower.notna().to_numpy() & (out == "")
+    if unknown.any():
+        raise ValueError(f"Unknown area: {lower[unknown].iloc[0]}")
+    return out
+
+
+_PROFILE_KEEP = re.compile(r"ctd|date|area_rd|cruise_id")
+_PROFILE_DROP = re.compile(
+    r"flag|file|bottle_closure_time|depth|latitude|longitude|beam_attenuation|oxygen_saturation|_2|_1"  # noqa
+)
+_DISCRETE_KEEP = re.compile(
+    r"area_rd|cruise_id|date|ctd_pressure|discrete|calculated"
+)
+_DISCRETE_DROP = re.compile(r"flag")
 
 
 def parse_profile_and_discrete(
@@ -224,36 +280,31 @@ def parse_profile_and_discrete(
     -------
     tuple
     """
-    sampledf.loc[:, "ctd_temperature"] = sampledf.apply(
-        lambda row: _check_double_sensors(row, "ctd_temperature"), axis=1
-    )
-    sampledf.loc[:, "ctd_conductivity"] = sampledf.apply(
-        lambda row: _check_double_sensors(row, "ctd_conductivity"), axis=1
-    )
-    sampledf.loc[:, "ctd_salinity"] = sampledf.apply(
-        lambda row: _check_double_sensors(row, "ctd_salinity"), axis=1
-    )
+    # Fall back to the secondary sensor wherever the primary is missing
+    for var in ["ctd_temperature", "ctd_conductivity", "ctd_salinity"]:
+        sensor_1 = sampledf[f"{var}_1"]
+        sampledf[var] = np.where(
+            sensor_1.isna(), sampledf[f"{var}_2"], sensor_1
+        )
     sampledf.loc[:, "date"] = sampledf["start_time"].apply(
         lambda row: row.strftime("%Y-%m")
     )
-    sampledf.loc[:, "area_rd"] = sampledf["station"].apply(_set_area)
+    sampledf["area_rd"] = _set_area_vec(sampledf["station"])
 
-    profile_cols = sampledf.columns[
-        sampledf.columns.str.contains("ctd|date|area_rd|cruise_id")
-        & ~sampledf.columns.str.contains(
-            "flag|file|bottle_closure_time|depth|latitude|longitude|beam_attenuation|oxygen_saturation|_2|_1"  # noqa
-        )
+    profile_cols = [
+        c
+        for c in sampledf.columns
+        if _PROFILE_KEEP.search(c) and not _PROFILE_DROP.search(c)
     ]
-    discrete_cols = sampledf.columns[
-        sampledf.columns.str.contains(
-            "area_rd|cruise_id|date|ctd_pressure|discrete|calculated"
-        )
-        & ~sampledf.columns.str.contains("flag")
+    discrete_cols = [
+        c
+        for c in sampledf.columns
+        if _DISCRETE_KEEP.search(c) and not _DISCRETE_DROP.search(c)
     ]
 
-    profile_df = sampledf[profile_cols]
-    profile_df.loc[:, "array_rd"] = array_rd
-    discrete_df = sampledf[discrete_cols]
-    discrete_df.loc[:, "array_rd"] = array_rd
+    profile_df = sampledf.loc[:, profile_cols].copy()
+    profile_df["array_rd"] = array_rd
+    discrete_df = sampledf.loc[:, discrete_cols].copy()
+    discrete_df["array_rd"] = array_rd
 
     return profile_df, discrete_df
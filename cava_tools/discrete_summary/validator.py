@@ -40,14 +40,15 @@ def check_types_and_replace(df: pd.DataFrame) -> pd.DataFrame:
             and "flag" not in k
         ):
             if v == "O":
-                do = df[k]
-                string_filter = do.str.contains("\w").fillna(False)  # noqa
-                invalid_values = ",".join(do[string_filter].unique())
-                logger.warning(
-                    f"** {k} ** contains invalid float values: {invalid_values} \n\tReplacing invalid values with NaNs..."  # noqa
-                )
-                # Replace invalid values with NaNs
-                df.loc[string_filter, k] = np.NaN
-                # Set final dtype to float64
-                df.loc[:, k] = df[k].astype(np.float64)
+                coerced = pd.to_numeric(df[k], errors="coerce")
+                invalid_mask = coerced.isna() & df[k].notna()
+                if invalid_mask.any():
+                    invalid_values = ",".join(
+                        df.loc[invalid_mask, k].astype(str).unique()
+                    )
+                    logger.warning(
+                        f"** {k} ** contains invalid float values: {invalid_values} \n\tReplacing invalid values with NaNs..."  # noqa
+                    )
+                # Invalid values are coerced to NaNs, final dtype float64
+                df[k] = coerced.astype(np.float64)
     return df